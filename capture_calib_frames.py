@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+One-shot capture of calibration frames for the INT8 TensorRT export.
+Grabs a spread of webcam frames (with or without the cat) into
+./calib/captured/ so export_yolo_engine.py calibrates on lighting and
+framing representative of this room, then exits.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import cv2
+
+CAPTURE_DIR = Path("./calib/captured")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Capture webcam frames for INT8 calibration')
+    parser.add_argument('--camera', type=int, default=0, help='Camera index (default: 0)')
+    parser.add_argument('--count', type=int, default=200,
+                        help='Number of frames to capture (default: 200)')
+    parser.add_argument('--interval', type=float, default=0.5,
+                        help='Seconds between frames (default: 0.5)')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Calibration Frame Capture")
+    print("=" * 60)
+
+    # DirectShow avoids the slow MSMF backend on Windows
+    if sys.platform == 'win32':
+        cap = cv2.VideoCapture(args.camera, cv2.CAP_DSHOW)
+    else:
+        cap = cv2.VideoCapture(args.camera)
+
+    if not cap.isOpened():
+        print("Error: Could not open webcam")
+        return 1
+
+    CAPTURE_DIR.mkdir(parents=True, exist_ok=True)
+    print(f"Capturing {args.count} frames to {CAPTURE_DIR}/ "
+          f"({args.interval}s apart, ~{args.count * args.interval:.0f}s total)...")
+
+    captured = 0
+    try:
+        while captured < args.count:
+            ret, frame = cap.read()
+            if not ret:
+                print("Error: Could not read frame")
+                break
+            cv2.imwrite(str(CAPTURE_DIR / f"calib_{captured:04d}.jpg"), frame)
+            captured += 1
+            if captured % 25 == 0:
+                print(f"  {captured}/{args.count} frames captured")
+            time.sleep(args.interval)
+    finally:
+        cap.release()
+
+    print(f"\nDone! {captured} frame(s) in {CAPTURE_DIR}/")
+    print("Now run: python export_yolo_engine.py  (INT8 calibration picks them up)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,8 +5,12 @@ Monitors webcam feed for cats, captures images, describes them, and posts to the
 """
 
 import cv2
+import numpy as np
 import time
+import queue
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from ultralytics import YOLO
@@ -14,9 +18,12 @@ import torch
 from PIL import Image
 import os
 from transformers import AutoModelForCausalLM, AutoTokenizer
+import argparse
 
 # Configuration
 WEBCAM_INDEX = 0
+DISPLAY_EVERY = 5  # Only refresh the preview window every Nth frame
+HASH_DISTANCE_THRESHOLD = 5  # Hamming distance below which the scene counts as unchanged
 CONFIDENCE_THRESHOLD = 0.5
 CAT_CLASS_ID = 15  # COCO dataset class ID for 'cat'
 PERSON_CLASS_ID = 0  # COCO dataset class ID for 'person'
@@ -24,6 +31,7 @@ COOLDOWN_SECONDS = 60  # Wait time between detections
 SAVE_DIR = Path("./detected_cats")
 SERVER_URL = "http://127.0.0.1:3000/ffion/status"
 COOKIE_FILE = "./cookies.txt"
+YOLO_ENGINE = Path("./yolov8n.engine")  # TensorRT engine built by export_yolo_engine.py
 
 # States for Ffion
 STATES = {
@@ -34,11 +42,24 @@ STATES = {
 }
 
 
+def check_quit_key():
+    """Non-blocking check for the 'q' key (pollKey avoids waitKey's forced sleep)."""
+    if hasattr(cv2, 'pollKey'):
+        return cv2.pollKey() & 0xFF == ord('q')
+    return cv2.waitKey(1) & 0xFF == ord('q')
+
+
 class CatDetector:
-    def __init__(self):
+    def __init__(self, headless=False):
         """Initialize the cat detector with YOLO and vision models."""
-        print("Loading YOLO model...")
-        self.yolo_model = YOLO('yolov8n.pt')  # Using YOLOv8 nano for speed
+        self.headless = headless
+        if YOLO_ENGINE.exists() and torch.cuda.is_available():
+            # Prefer the quantized TensorRT engine (see export_yolo_engine.py)
+            print(f"Loading TensorRT engine: {YOLO_ENGINE}")
+            self.yolo_model = YOLO(str(YOLO_ENGINE))
+        else:
+            print("Loading YOLO model...")
+            self.yolo_model = YOLO('yolov8n.pt')  # Using YOLOv8 nano for speed
         print("YOLO model loaded!")
 
         print("Loading Moondream vision model...")
@@ -63,6 +84,40 @@ class CatDetector:
         # Track last detection time
         self.last_detection_time = 0
 
+        # Single worker that writes JPEGs off the detection thread
+        self._save_pool = ThreadPoolExecutor(max_workers=1)
+
+        # Hash of the last frame YOLO confirmed cat-free (perceptual-hash gate)
+        self._last_no_cat_hash = None
+
+    @staticmethod
+    def _frame_hash(frame):
+        """64-bit average hash of the frame (8x8 grayscale thresholded at its median)."""
+        small = cv2.cvtColor(cv2.resize(frame, (8, 8)), cv2.COLOR_BGR2GRAY)
+        bits = (small > np.median(small)).flatten()
+        frame_hash = 0
+        for bit in bits:
+            frame_hash = (frame_hash << 1) | int(bit)
+        return frame_hash
+
+    def _capture_worker(self, cap, frame_queue, stop_event):
+        """Producer thread: read frames and keep only the freshest one queued.
+
+        cap.read() is a blocking syscall; running it here means the detection
+        loop never waits on the camera, and dropping the stale frame keeps
+        YOLO looking at the newest image instead of a backed-up buffer.
+        """
+        while not stop_event.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                frame_queue.put(None)  # signal read failure to the main loop
+                return
+            try:
+                frame_queue.get_nowait()  # drop the stale frame, if any
+            except queue.Empty:
+                pass
+            frame_queue.put(frame)
+
     def _load_cookie(self):
         """Load session cookie from cookies.txt file."""
         if not Path(COOKIE_FILE).exists():
@@ -107,11 +162,15 @@ class CatDetector:
 
         return cat_detected, cat_confidence, person_detected
 
-    def describe_image(self, image_path):
-        """Use Moondream vision model to describe the image."""
+    def describe_image(self, image):
+        """Use Moondream vision model to describe an already-captured frame.
+
+        Accepts a BGR numpy frame or a PIL image, so the description doesn't
+        have to wait for (or re-read) the JPEG being written in the background.
+        """
         try:
-            # Load image
-            image = Image.open(image_path)
+            if not isinstance(image, Image.Image):
+                image = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
 
             # Generate description with a cat-focused prompt using Moondream's query method
             prompt = "Describe what this cat is doing in one short sentence."
@@ -191,6 +250,20 @@ class CatDetector:
             print(f"Error posting to server: {e}")
             return False
 
+    def _show_frame(self, frame, frame_count, force=False):
+        """Display the frame and check for quit. Returns True if 'q' was pressed.
+
+        imshow + key polling still cost a window copy per call, so unannotated
+        frames are only shown every DISPLAY_EVERY frames; annotated frames
+        (detections, warnings) are always shown. No-op in headless mode.
+        """
+        if self.headless:
+            return False
+        if force or frame_count % DISPLAY_EVERY == 0:
+            cv2.imshow('Cat Detector', frame)
+            return check_quit_key()
+        return False
+
     def run(self):
         """Main loop to monitor webcam and detect cats."""
         print(f"Starting webcam (index {WEBCAM_INDEX})...")
@@ -207,18 +280,25 @@ class CatDetector:
 
         frame_count = 0
 
+        # Capture runs on its own thread so the camera never blocks detection
+        frame_queue = queue.Queue(maxsize=1)
+        stop_event = threading.Event()
+        capture_thread = threading.Thread(target=self._capture_worker,
+                                          args=(cap, frame_queue, stop_event),
+                                          daemon=True)
+        capture_thread.start()
+
         try:
             while True:
-                ret, frame = cap.read()
-                if not ret:
+                frame = frame_queue.get()
+                if frame is None:
                     print("Error: Could not read frame")
                     break
 
                 # Only process every 10th frame to save CPU
                 frame_count += 1
                 if frame_count % 10 != 0:
-                    cv2.imshow('Cat Detector', frame)
-                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                    if self._show_frame(frame, frame_count):
                         break
                     continue
 
@@ -229,21 +309,32 @@ class CatDetector:
                     remaining = int(COOLDOWN_SECONDS - (current_time - self.last_detection_time))
                     cv2.putText(frame, f"Cooldown: {remaining}s", (10, 30),
                                cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
-                    cv2.imshow('Cat Detector', frame)
-                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                    if self._show_frame(frame, frame_count, force=True):
+                        break
+                    continue
+
+                # Skip YOLO if the scene hasn't changed since the last cat-free
+                # frame - a 64-bit hash compare is orders of magnitude cheaper
+                # than a forward pass, and a static room is the common case
+                frame_hash = self._frame_hash(frame)
+                if (self._last_no_cat_hash is not None and
+                        bin(frame_hash ^ self._last_no_cat_hash).count('1') < HASH_DISTANCE_THRESHOLD):
+                    if self._show_frame(frame, frame_count):
                         break
                     continue
 
                 # Detect cat (and check for person for privacy)
                 cat_detected, confidence, person_detected = self.detect_cat(frame)
 
+                # Remember cat-free scenes; any cat sighting re-arms detection
+                self._last_no_cat_hash = None if cat_detected else frame_hash
+
                 # Privacy filter #1: Skip if both person and cat detected
                 if cat_detected and person_detected:
                     print(f"⚠ Privacy filter: Person detected with cat, skipping frame")
                     cv2.putText(frame, "PRIVACY: Person detected", (10, 30),
                                cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-                    cv2.imshow('Cat Detector', frame)
-                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                    if self._show_frame(frame, frame_count, force=True):
                         break
                     continue
 
@@ -253,11 +344,12 @@ class CatDetector:
                     # Save image
                     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                     image_path = SAVE_DIR / f"cat_{timestamp}.jpg"
-                    cv2.imwrite(str(image_path), frame)
-                    print(f"Saved image: {image_path}")
+                    # Encode/write on the save worker so it overlaps with description
+                    save_future = self._save_pool.submit(cv2.imwrite, str(image_path), frame.copy())
+                    print(f"Saving image: {image_path}")
 
-                    # Describe image
-                    description = self.describe_image(image_path)
+                    # Describe image (from the in-memory frame, while the JPEG writes)
+                    description = self.describe_image(frame)
                     print(f"Description: {description}")
 
                     # Privacy filter #2: Check if description mentions a person
@@ -272,7 +364,8 @@ class CatDetector:
                     state = self.determine_state(description)
                     print(f"State: {state}")
 
-                    # Post to server
+                    # Post to server (make sure the image is on disk first)
+                    save_future.result()
                     self.post_to_server(image_path, description, state)
 
                     # Update last detection time
@@ -283,23 +376,30 @@ class CatDetector:
                                cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
 
                 # Display frame
-                cv2.imshow('Cat Detector', frame)
-                if cv2.waitKey(1) & 0xFF == ord('q'):
+                if self._show_frame(frame, frame_count, force=True):
                     break
 
         finally:
+            stop_event.set()
+            capture_thread.join(timeout=2)
             cap.release()
-            cv2.destroyAllWindows()
+            if not self.headless:
+                cv2.destroyAllWindows()
             print("Webcam released")
 
 
 def main():
     """Main entry point."""
+    parser = argparse.ArgumentParser(description='Monitor a webcam for cats')
+    parser.add_argument('--headless', action='store_true',
+                        help='Run without the preview window (saves CPU on capture-only hosts)')
+    args = parser.parse_args()
+
     print("=" * 60)
     print("Ffion Cat Detector")
     print("=" * 60)
 
-    detector = CatDetector()
+    detector = CatDetector(headless=args.headless)
     detector.run()
 
 
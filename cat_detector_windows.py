@@ -5,26 +5,67 @@ Monitors webcam feed for cats, captures images, describes them, and posts to the
 """
 
 import cv2
+import numpy as np
 import time
+import queue
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from ultralytics import YOLO
 import torch
 from PIL import Image
 import os
+import re
 import sys
 from transformers import AutoModelForCausalLM, AutoTokenizer
 
+# Optional: libjpeg-turbo encodes JPEGs 2-3x faster than OpenCV's bundled
+# libjpeg (pip install PyTurboJPEG, plus the libjpeg-turbo DLL on Windows)
+try:
+    from turbojpeg import TurboJPEG
+    _turbo_jpeg = TurboJPEG()
+except Exception:
+    _turbo_jpeg = None
+
+# Probe CUDA once (each call can initialize the driver context) and let
+# cuDNN autotune conv algorithms - the YOLO input shape is fixed, so the
+# one-off benchmark pays for itself, and 'high' matmul precision enables
+# TF32 on Ampere+ GPUs
+HAS_CUDA = torch.cuda.is_available()
+torch.backends.cudnn.benchmark = HAS_CUDA
+torch.set_float32_matmul_precision('high')
+
 # Configuration
 CONFIDENCE_THRESHOLD = 0.5
+PERSON_CONFIDENCE_THRESHOLD = 0.3  # Lower bar for persons - privacy errs toward recall
 CAT_CLASS_ID = 15  # COCO dataset class ID for 'cat'
 PERSON_CLASS_ID = 0  # COCO dataset class ID for 'person'
+# The Moondream-based privacy re-check costs a full VLM pass per detection and
+# duplicates the YOLO person screen above; opt back in with this env var
+DESCRIPTION_PRIVACY_FILTER = os.environ.get("FFION_DESCRIPTION_PRIVACY_FILTER", "0") == "1"
 COOLDOWN_SECONDS = 60  # Wait time between detections
 SAVE_DIR = Path("./detected_cats")
+JPEG_QUALITY = 85  # Visually transparent for webcam frames, smaller uploads
 # WSL server is accessible from Windows via localhost
 SERVER_URL = "http://localhost:3000/ffion/status"
 COOKIE_FILE = "./cookies.txt"
+# TensorRT engine built by export_yolo_engine.py; for the live path export
+# with --half --imgsz 416: the webcam loop needs latency, not peak mAP
+YOLO_ENGINE = Path("./yolov8n.engine")
+YOLO_ONNX = Path("./yolov8n.onnx")  # ONNX export (export_yolo_engine.py --onnx)
+LIVE_IMGSZ = 416
+# Nearly every webcam supports 640x480 natively (416 is not a real capture
+# mode); asking the driver for it beats receiving 1080p and resizing on host
+CAPTURE_WIDTH = 640
+CAPTURE_HEIGHT = 480
+# Motion gate: YOLO only runs when the MOG2 foreground mask (computed on a
+# downscaled gray frame, well under a millisecond) has at least this many
+# changed pixels - ~0.8% of the 160x120 mask, far below cat-sized motion
+MOTION_DOWNSCALE = (160, 120)
+MOTION_PIXEL_THRESHOLD = 150
 
 # States for Ffion
 STATES = {
@@ -35,34 +76,99 @@ STATES = {
 }
 
 
+# Keyword sets built once at import; a description is tokenized a single time
+# and both the privacy check and the state lookup are C-level frozenset
+# intersections. Exact-token matching replaces the old stem regexes, so
+# inflected forms are listed explicitly ('eating', 'asleep', 'children', ...).
+_WORD_RE = re.compile(r"[a-z]+")
+_STATE_WORDS = {
+    "eating": frozenset({
+        'eat', 'eats', 'eating', 'ate', 'eaten',
+        'food', 'dinner', 'breakfast', 'treat', 'treats'}),
+    "playing": frozenset({
+        'play', 'plays', 'playing', 'played', 'playful',
+        'energy', 'energetic', 'hunt', 'hunts', 'hunting'}),
+    "sleeping": frozenset({
+        'sleep', 'sleeps', 'sleeping', 'asleep', 'nap', 'naps', 'napping',
+        'rest', 'rests', 'resting', 'rested', 'yawn', 'yawns', 'yawning'}),
+    "zoomies": frozenset({
+        'zoom', 'zooms', 'zooming', 'zoomies',
+        'mischief', 'mischievous', 'midnight'}),
+}
+_PERSON_WORDS = frozenset({
+    'person', 'persons', 'people', 'human', 'humans', 'man', 'men',
+    'woman', 'women', 'someone', 'somebody', 'individual', 'individuals',
+    'owner', 'owners', 'lady', 'ladies', 'gentleman', 'gentlemen',
+    'boy', 'boys', 'girl', 'girls', 'child', 'children', 'kid', 'kids',
+    'adult', 'adults'})
+
+
+def _classify_description(description):
+    """Tokenize a description once and return (mentions_person, state or None).
+
+    State priority follows _STATE_WORDS insertion order (eating first):
+    when a description matches several states, category order decides,
+    regardless of where the keywords appear in the text.
+    """
+    tokens = set(_WORD_RE.findall(description.lower()))
+    is_person = not _PERSON_WORDS.isdisjoint(tokens)
+    for name, words in _STATE_WORDS.items():
+        if not words.isdisjoint(tokens):
+            return is_person, STATES[name]
+    return is_person, None
+
+
+def _probe_camera(index):
+    """Open one camera index, verify it delivers frames, and report its mode.
+
+    Working cameras are returned with their capture still open so the chosen
+    one can be handed straight to the detector - DirectShow device init takes
+    seconds, and releasing here would just mean paying for it twice.
+    """
+    cap = cv2.VideoCapture(index, cv2.CAP_DSHOW)
+    if cap.isOpened():
+        # Try to read a frame to verify it actually works
+        ret, frame = cap.read()
+        if ret and frame is not None:
+            # Get camera properties
+            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            return {
+                'index': index,
+                'width': width,
+                'height': height,
+                'cap': cap
+            }
+    cap.release()
+    return None
+
+
 def list_available_cameras():
-    """Scan for available cameras and return a list of working indices."""
+    """Scan camera indices 0-10 in parallel and return the working ones.
+
+    Probing an unavailable DirectShow index can take up to a second to time
+    out; running all probes concurrently makes startup cost roughly one probe
+    instead of eleven.
+    """
     print("Scanning for available cameras...")
-    available_cameras = []
-
-    # Try camera indices 0-10
-    for index in range(11):
-        cap = cv2.VideoCapture(index, cv2.CAP_DSHOW)
-        if cap.isOpened():
-            # Try to read a frame to verify it actually works
-            ret, frame = cap.read()
-            if ret and frame is not None:
-                # Get camera properties
-                width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-                available_cameras.append({
-                    'index': index,
-                    'width': width,
-                    'height': height
-                })
-                print(f"  ✓ Camera {index}: {width}x{height}")
-            cap.release()
+
+    with ThreadPoolExecutor(max_workers=11) as executor:
+        results = executor.map(_probe_camera, range(11))
+
+    available_cameras = sorted((cam for cam in results if cam is not None),
+                               key=lambda cam: cam['index'])
+    for cam in available_cameras:
+        print(f"  ✓ Camera {cam['index']}: {cam['width']}x{cam['height']}")
 
     return available_cameras
 
 
 def select_camera():
-    """Prompt user to select a camera from available cameras."""
+    """Prompt user to select a camera; returns (index, open VideoCapture).
+
+    The chosen camera's capture (already opened by the probe) is kept and
+    handed to the caller; every unchosen capture is released here.
+    """
     cameras = list_available_cameras()
 
     if not cameras:
@@ -70,10 +176,17 @@ def select_camera():
         print("Make sure your webcam is connected and not in use by another application.")
         sys.exit(1)
 
+    def _choose(camera_index):
+        for cam in cameras:
+            if cam['index'] != camera_index:
+                cam['cap'].release()
+        selected = next(cam for cam in cameras if cam['index'] == camera_index)
+        return selected['index'], selected['cap']
+
     if len(cameras) == 1:
         selected = cameras[0]
         print(f"\nOnly one camera found. Using Camera {selected['index']}")
-        return selected['index']
+        return _choose(selected['index'])
 
     print(f"\nFound {len(cameras)} camera(s)")
     print("\nAvailable cameras:")
@@ -88,37 +201,89 @@ def select_camera():
             # Check if the selected index is in our available cameras
             if any(cam['index'] == camera_index for cam in cameras):
                 print(f"✓ Selected Camera {camera_index}")
-                return camera_index
+                return _choose(camera_index)
             else:
                 print(f"❌ Camera {camera_index} is not available. Please choose from the list above.")
         except ValueError:
             print("❌ Please enter a valid number.")
         except KeyboardInterrupt:
             print("\n\nCancelled by user.")
+            for cam in cameras:
+                cam['cap'].release()
             sys.exit(0)
 
 
+class OnnxYoloDetector:
+    """YOLOv8 adapter for Windows machines without an NVIDIA GPU.
+
+    Runs yolov8n.onnx under ONNX Runtime with the DirectML execution provider,
+    which reaches AMD/Intel/NVIDIA GPUs through DX12 (install
+    onnxruntime-directml; plain onnxruntime falls back to CPU). Only
+    per-class presence and peak confidence are needed, so the raw
+    (84, anchors) head output is reduced with class-max scores - no NMS.
+    """
+
+    def __init__(self, onnx_path):
+        import onnxruntime as ort
+        self.session = ort.InferenceSession(
+            str(onnx_path),
+            providers=['DmlExecutionProvider', 'CPUExecutionProvider'])
+        self.provider = self.session.get_providers()[0]
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        # Dynamic exports leave H/W symbolic; fall back to the live size
+        self.imgsz = model_input.shape[2] if isinstance(model_input.shape[2], int) else LIVE_IMGSZ
+
+    def _preprocess(self, frame):
+        """Letterbox a BGR frame to the model input size, scaled to [0,1] CHW."""
+        height, width = frame.shape[:2]
+        scale = self.imgsz / max(height, width)
+        resized = cv2.resize(frame, (round(width * scale), round(height * scale)))
+        canvas = np.full((self.imgsz, self.imgsz, 3), 114, dtype=np.uint8)
+        canvas[:resized.shape[0], :resized.shape[1]] = resized
+        img = canvas[:, :, ::-1].transpose(2, 0, 1)[None].astype(np.float32) / 255.0
+        return np.ascontiguousarray(img)
+
+    def detect(self, frame):
+        """Return (cat_detected, cat_confidence, person_detected) for a frame."""
+        preds = self.session.run(None, {self.input_name: self._preprocess(frame)})[0][0]
+        # preds: (84, anchors) = 4 box coords then 80 class scores per anchor
+        cat_confidence = float(preds[4 + CAT_CLASS_ID].max())
+        person_confidence = float(preds[4 + PERSON_CLASS_ID].max())
+
+        cat_detected = cat_confidence >= CONFIDENCE_THRESHOLD
+        person_detected = person_confidence >= PERSON_CONFIDENCE_THRESHOLD
+        return cat_detected, cat_confidence if cat_detected else 0.0, person_detected
+
+
 class CatDetector:
-    def __init__(self, webcam_index=0):
-        """Initialize the cat detector with YOLO and vision models."""
+    def __init__(self, webcam_index=0, cap=None):
+        """Initialize the cat detector with YOLO and vision models.
+
+        `cap` is an already-open VideoCapture handed over from camera
+        selection, saving a second multi-second DirectShow device init.
+        """
         self.webcam_index = webcam_index
+        self._cap = cap
 
-        print("Loading YOLO model...")
-        self.yolo_model = YOLO('yolov8n.pt')  # Using YOLOv8 nano for speed
+        self.yolo_model = self._load_yolo_model()
         print("YOLO model loaded!")
 
+        # Pre-allocated detection input buffer, reused across frames on GPU;
+        # the pinned host staging buffer is sized to the first frame seen
+        # (the driver may not honor the requested capture resolution)
+        self._gpu_input = None
+        self._pinned_frame = None
+        if HAS_CUDA:
+            self._gpu_input = torch.full((1, 3, LIVE_IMGSZ, LIVE_IMGSZ), 114 / 255,
+                                         dtype=torch.float16, device='cuda')
+
         print("Loading Moondream vision model...")
         model_id = "vikhyatk/moondream2"
         revision = "2025-06-21"  # Stable revision with better quality
-        self.vision_model = AutoModelForCausalLM.from_pretrained(
-            model_id,
-            revision=revision,
-            trust_remote_code=True,
-            torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
-            device_map={"": "cuda" if torch.cuda.is_available() else "cpu"}
-        )
+        self.vision_model = self._load_vision_model(model_id, revision)
         self.vision_tokenizer = AutoTokenizer.from_pretrained(model_id, revision=revision)
-        print(f"Vision model loaded! (Using {'GPU' if torch.cuda.is_available() else 'CPU'})")
+        print(f"Vision model loaded! (Using {'GPU' if HAS_CUDA else 'CPU'})")
 
         # Create save directory
         SAVE_DIR.mkdir(exist_ok=True)
@@ -126,9 +291,130 @@ class CatDetector:
         # Load session cookie
         self.session_cookie = self._load_cookie()
 
+        # Persistent HTTP session: reuses one keep-alive socket to the WSL
+        # server instead of paying TCP setup/teardown on every post
+        self._http = requests.Session()
+        self._http.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        if self.session_cookie:
+            self._http.cookies.set('ffion_sid', self.session_cookie)
+
         # Track last detection time
         self.last_detection_time = 0
 
+        # Background model gating YOLO: in a static scene nearly every frame
+        # is rejected by this, keeping the GPU idle until something moves
+        self._bg = cv2.createBackgroundSubtractorMOG2(
+            history=500, varThreshold=25, detectShadows=False)
+
+        # Single worker that writes JPEGs off the detection path
+        self._save_pool = ThreadPoolExecutor(max_workers=1)
+
+        # Single worker that runs describe -> privacy check -> post, so the
+        # capture/display loop never blocks on a multi-second Moondream call
+        self._describe_pool = ThreadPoolExecutor(max_workers=1)
+        self._detection_future = None
+
+    def _load_vision_model(self, model_id, revision):
+        """Load Moondream with weights-only INT8 quantization on GPU.
+
+        Single-image generation is weight-bandwidth-bound, so int8 weights
+        halve the bytes moved per decoded token vs fp16 (and halve VRAM) with
+        negligible text-quality loss. Tries bitsandbytes first, then torchao
+        on the fp16 model, and keeps plain fp16 if neither is installed.
+        """
+        if not HAS_CUDA:
+            return AutoModelForCausalLM.from_pretrained(
+                model_id,
+                revision=revision,
+                trust_remote_code=True,
+                torch_dtype=torch.float32,
+                device_map={"": "cpu"}
+            )
+
+        try:
+            from transformers import BitsAndBytesConfig
+            model = AutoModelForCausalLM.from_pretrained(
+                model_id,
+                revision=revision,
+                trust_remote_code=True,
+                quantization_config=BitsAndBytesConfig(load_in_8bit=True),
+                device_map={"": "cuda"}
+            )
+            return self._compile_decode_loop(model)
+        except Exception as e:
+            print(f"bitsandbytes int8 unavailable ({e}), trying torchao")
+
+        model = AutoModelForCausalLM.from_pretrained(
+            model_id,
+            revision=revision,
+            trust_remote_code=True,
+            torch_dtype=torch.float16,
+            device_map={"": "cuda"}
+        )
+        try:
+            from torchao.quantization import quantize_, int8_weight_only
+            quantize_(model, int8_weight_only())
+            print("Moondream quantized with torchao int8 weight-only")
+        except Exception as e:
+            print(f"torchao unavailable ({e}), keeping fp16 weights")
+        return self._compile_decode_loop(model)
+
+    def _compile_decode_loop(self, model):
+        """Compile Moondream's decode loop with CUDA graphs (reduce-overhead mode).
+
+        Each description launches hundreds of tiny per-token kernels through
+        eager Python; reduce-overhead captures them in a CUDA graph and
+        replays it per step. The bare model is compiled (not a pipeline
+        wrapper), and a warmup query with suppress_errors off makes any
+        compile failure raise here - where we can fall back to eager decoding
+        - instead of silently degrading every later call.
+        """
+        try:
+            torch._dynamo.config.suppress_errors = False
+            model.compile(mode='reduce-overhead', fullgraph=False)
+            # Warmup triggers compilation now so the first real detection isn't slow
+            model.query(Image.new('RGB', (224, 224)), "Warmup.")
+            print("Moondream decode loop compiled (CUDA graphs)")
+        except Exception as e:
+            print(f"torch.compile unavailable for Moondream ({e}), using eager decode")
+            # compile() is in-place, so tell dynamo to run failing regions eagerly
+            torch._dynamo.config.suppress_errors = True
+        return model
+
+    def _load_yolo_model(self):
+        """Load the TensorRT engine when available, falling back to PyTorch weights.
+
+        Engines are compiled for a specific GPU architecture, so a cached
+        yolov8n.engine copied from (or built on) another card can fail to
+        deserialize or crash on first inference. A dummy warmup predict
+        surfaces that here, where we can still fall back cleanly.
+        """
+        if YOLO_ENGINE.exists() and HAS_CUDA:
+            print(f"Loading TensorRT engine: {YOLO_ENGINE}")
+            try:
+                # Engine is already FP16; no half=True needed at predict time
+                model = YOLO(str(YOLO_ENGINE))
+                warmup = np.zeros((LIVE_IMGSZ, LIVE_IMGSZ, 3), dtype=np.uint8)
+                model(warmup, verbose=False)
+                return model
+            except Exception as e:
+                print(f"Engine failed to load ({e})")
+                print("It was likely built for a different GPU - re-run "
+                      "export_yolo_engine.py on this machine. Using yolov8n.pt for now.")
+
+        # No CUDA: try ONNX Runtime with DirectML so Intel/AMD iGPUs still
+        # beat CPU inference (export with: python export_yolo_engine.py --onnx)
+        if not HAS_CUDA and YOLO_ONNX.exists():
+            try:
+                detector = OnnxYoloDetector(YOLO_ONNX)
+                print(f"Loaded {YOLO_ONNX} with ONNX Runtime ({detector.provider})")
+                return detector
+            except Exception as e:
+                print(f"ONNX Runtime unavailable ({e}), using Ultralytics")
+
+        print("Loading YOLO model...")
+        return YOLO('yolov8n.pt')  # Using YOLOv8 nano for speed
+
     def _load_cookie(self):
         """Load session cookie from cookies.txt file."""
         if not Path(COOKIE_FILE).exists():
@@ -151,34 +437,72 @@ class CatDetector:
             print(f"Error reading cookie file: {e}")
             return None
 
+    def _frame_to_gpu_tensor(self, frame):
+        """Letterbox a BGR frame into the pre-allocated fp16 CUDA input buffer.
+
+        One pinned host-to-device copy of the raw uint8 frame replaces
+        Ultralytics' per-call numpy preprocessing and fp32 upload; color
+        conversion, scaling and normalization all run on the GPU, and both
+        buffers are reused across frames so nothing is reallocated per call.
+        """
+        # Pinning memory is an expensive driver call, so the staging buffer
+        # is allocated once and only replaced if the frame shape changes
+        if self._pinned_frame is None or tuple(self._pinned_frame.shape) != frame.shape:
+            self._pinned_frame = torch.empty(frame.shape, dtype=torch.uint8, pin_memory=True)
+        self._pinned_frame.copy_(torch.from_numpy(np.ascontiguousarray(frame)))
+        img = self._pinned_frame.to('cuda', non_blocking=True)
+        # BGR -> RGB, HWC -> CHW, uint8 -> fp16 [0,1]
+        img = img.flip(-1).permute(2, 0, 1).unsqueeze(0).half().div_(255.0)
+        scale = LIVE_IMGSZ / max(img.shape[2], img.shape[3])
+        new_h = round(img.shape[2] * scale)
+        new_w = round(img.shape[3] * scale)
+        img = torch.nn.functional.interpolate(img, size=(new_h, new_w), mode='bilinear', align_corners=False)
+        self._gpu_input.fill_(114 / 255)  # YOLO's letterbox padding value
+        self._gpu_input[..., :new_h, :new_w].copy_(img)
+        return self._gpu_input
+
     def detect_cat(self, frame):
         """Detect if a cat is present in the frame. Also checks for person detection for privacy."""
-        results = self.yolo_model(frame, verbose=False)
-
-        cat_detected = False
-        cat_confidence = 0.0
-        person_detected = False
-
-        for result in results:
-            boxes = result.boxes
-            for box in boxes:
-                class_id = int(box.cls[0])
-                confidence = float(box.conf[0])
-
-                if class_id == CAT_CLASS_ID and confidence >= CONFIDENCE_THRESHOLD:
-                    cat_detected = True
-                    cat_confidence = max(cat_confidence, confidence)
-
-                if class_id == PERSON_CLASS_ID and confidence >= CONFIDENCE_THRESHOLD:
-                    person_detected = True
+        if isinstance(self.yolo_model, OnnxYoloDetector):
+            return self.yolo_model.detect(frame)
+
+        results = None
+        if self._gpu_input is not None:
+            # Ultralytics accepts device tensors directly, skipping its own
+            # host-side preprocessing and per-call H2D copy
+            try:
+                results = self.yolo_model(self._frame_to_gpu_tensor(frame), verbose=False)
+            except Exception as e:
+                print(f"GPU-resident preprocessing failed ({e}), using the numpy path")
+                self._gpu_input = None
+
+        if results is None:
+            results = self.yolo_model(frame, verbose=False)
+
+        # Reduce the boxes with vectorized tensor ops instead of a Python
+        # per-box loop: three scalar syncs per frame rather than two per box
+        boxes = results[0].boxes
+        cls = boxes.cls.to(torch.int64)
+        conf = boxes.conf
+
+        mask_cat = (cls == CAT_CLASS_ID) & (conf >= CONFIDENCE_THRESHOLD)
+        mask_person = (cls == PERSON_CLASS_ID) & (conf >= PERSON_CONFIDENCE_THRESHOLD)
+
+        cat_detected = bool(mask_cat.any())
+        cat_confidence = float(conf[mask_cat].max()) if cat_detected else 0.0
+        person_detected = bool(mask_person.any())
 
         return cat_detected, cat_confidence, person_detected
 
-    def describe_image(self, image_path):
-        """Use Moondream vision model to describe the image."""
+    def describe_image(self, image):
+        """Use Moondream vision model to describe an already-captured frame.
+
+        Accepts a BGR numpy frame or a PIL image, so the frame never takes a
+        JPEG encode/decode round-trip through disk just to be described.
+        """
         try:
-            # Load image
-            image = Image.open(image_path)
+            if not isinstance(image, Image.Image):
+                image = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
 
             # Generate description with a cat-focused prompt using Moondream's query method
             prompt = "Describe what this cat is doing in one short sentence."
@@ -202,25 +526,12 @@ class CatDetector:
 
     def check_person_in_description(self, description):
         """Check if the description mentions a person (privacy filter)."""
-        description_lower = description.lower()
-        person_words = ['person', 'people', 'human', 'man', 'woman', 'someone', 'individual',
-                        'owner', 'lady', 'gentleman', 'boy', 'girl', 'child', 'adult']
-        return any(word in description_lower for word in person_words)
+        return _classify_description(description)[0]
 
     def determine_state(self, description):
         """Determine the cat's state based on the description."""
-        description_lower = description.lower()
-
-        if any(word in description_lower for word in ['eat', 'food', 'dinner', 'breakfast', 'treats']):
-            return STATES["eating"]
-        elif any(word in description_lower for word in ['play', 'energy', 'hunt']):
-            return STATES["playing"]
-        elif any(word in description_lower for word in ['sleep', 'nap', 'rest', 'yawn']):
-            return STATES["sleeping"]
-        elif any(word in description_lower for word in ['zoom', 'mischief', 'midnight']):
-            return STATES["zoomies"]
-        else:
-            return STATES["playing"]  # Default state
+        state = _classify_description(description)[1]
+        return state if state is not None else STATES["playing"]  # Default state
 
     def post_to_server(self, image_path, description, state):
         """Post the image and description to the server."""
@@ -235,14 +546,13 @@ class CatDetector:
                     'state': state,
                     'text': description
                 }
-                cookies = {'ffion_sid': self.session_cookie}
 
                 print(f"Posting to {SERVER_URL}...")
-                response = requests.post(
+                # Session carries the ffion_sid cookie and reuses the socket
+                response = self._http.post(
                     SERVER_URL,
                     files=files,
                     data=data,
-                    cookies=cookies,
                     timeout=10
                 )
 
@@ -259,16 +569,82 @@ class CatDetector:
             print(f"Error posting to server: {e}")
             return False
 
+    @staticmethod
+    def _write_jpeg(image_path, frame):
+        """Encode a BGR frame to JPEG and write it; runs on the save worker.
+
+        Uses libjpeg-turbo when PyTurboJPEG is installed, otherwise
+        cv2.imencode - both keep the encode itself off the detection path.
+        """
+        if _turbo_jpeg is not None:
+            jpeg_bytes = _turbo_jpeg.encode(frame, quality=JPEG_QUALITY)
+        else:
+            ok, buf = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+            if not ok:
+                raise RuntimeError(f"JPEG encode failed for {image_path}")
+            jpeg_bytes = buf.tobytes()
+        image_path.write_bytes(jpeg_bytes)
+
+    def _handle_detection(self, frame):
+        """Save, describe, privacy-check, and post a frame with a confirmed cat.
+
+        Runs on the describe worker thread; the main loop has already started
+        the cooldown, so a slow Moondream call never freezes the display.
+        The main loop only checks the future's done() flag, so any error has
+        to be logged here - an exception left on the future is never read.
+        """
+        try:
+            # Encode and save on the background worker so the JPEG work
+            # overlaps with the (much slower) description
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            image_path = SAVE_DIR / f"cat_{timestamp}.jpg"
+            save_future = self._save_pool.submit(self._write_jpeg, image_path, frame.copy())
+            print(f"Saving image: {image_path}")
+
+            # Describe image straight from the in-memory frame
+            description = self.describe_image(frame)
+            print(f"Description: {description}")
+
+            # Privacy filter #2 (opt-in): YOLO already screens for people at
+            # the lowered person threshold, so the VLM re-check is off by
+            # default; set FFION_DESCRIPTION_PRIVACY_FILTER=1 to keep it as a
+            # third layer
+            if DESCRIPTION_PRIVACY_FILTER and self.check_person_in_description(description):
+                print(f"⚠ Privacy filter: Description mentions person, skipping post")
+                print(f"  (Image saved locally but not posted)")
+                return
+
+            # Determine state
+            state = self.determine_state(description)
+            print(f"State: {state}")
+
+            # Post to server (make sure the image is on disk first)
+            save_future.result()
+            self.post_to_server(image_path, description, state)
+        except Exception as e:
+            print(f"Error processing detection ({e}); status not posted")
+
     def run(self):
         """Main loop to monitor webcam and detect cats."""
-        print(f"\nStarting webcam (index {self.webcam_index})...")
-        cap = cv2.VideoCapture(self.webcam_index, cv2.CAP_DSHOW)  # Use DirectShow on Windows
+        cap = self._cap
+        if cap is not None and cap.isOpened():
+            print(f"\nReusing webcam opened during camera selection (index {self.webcam_index})")
+        else:
+            print(f"\nStarting webcam (index {self.webcam_index})...")
+            cap = cv2.VideoCapture(self.webcam_index, cv2.CAP_DSHOW)  # Use DirectShow on Windows
 
         if not cap.isOpened():
             print("Error: Could not open webcam")
             print("Make sure your webcam is connected and not in use by another application.")
             return
 
+        # Ask the driver for low-res frames so the capture path (and every
+        # imshow) doesn't move full-resolution images just to downscale them
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, CAPTURE_WIDTH)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, CAPTURE_HEIGHT)
+        # Keep the driver buffer at one frame so grabs never return stale video
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
         print("Webcam opened successfully!")
         print(f"Monitoring for cats... (confidence threshold: {CONFIDENCE_THRESHOLD})")
         print(f"Cooldown between detections: {COOLDOWN_SECONDS}s")
@@ -277,80 +653,115 @@ class CatDetector:
 
         frame_count = 0
 
-        try:
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    print("Error: Could not read frame")
-                    break
-
-                # Only process every 10th frame to save CPU
-                frame_count += 1
-                if frame_count % 10 != 0:
-                    cv2.imshow('Cat Detector', frame)
-                    if cv2.waitKey(1) & 0xFF == ord('q'):
-                        break
+        # YOLO runs on its own thread: capture and display never block on
+        # inference, and candidate frames are dropped when the detector is
+        # still busy with the previous one
+        frame_queue = queue.Queue(maxsize=2)
+        result_queue = queue.Queue()
+        stop_event = threading.Event()
+
+        def inference_worker():
+            while not stop_event.is_set():
+                try:
+                    candidate = frame_queue.get(timeout=0.5)
+                except queue.Empty:
                     continue
+                try:
+                    result_queue.put((candidate, self.detect_cat(candidate)))
+                except Exception as e:
+                    # Keep the worker alive: an uncaught error here would
+                    # kill the daemon thread and leave a long-running monitor
+                    # displaying frames with detection silently dead
+                    print(f"Detection failed on a frame ({e}), continuing")
+
+        inference_thread = threading.Thread(target=inference_worker, daemon=True)
+        inference_thread.start()
 
-                # Check cooldown
+        last_countdown_refresh = 0.0
+
+        try:
+            while True:
                 current_time = time.time()
-                if current_time - self.last_detection_time < COOLDOWN_SECONDS:
-                    # Draw cooldown timer on frame
-                    remaining = int(COOLDOWN_SECONDS - (current_time - self.last_detection_time))
-                    cv2.putText(frame, f"Cooldown: {remaining}s", (10, 30),
-                               cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
-                    cv2.imshow('Cat Detector', frame)
-                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                remaining = COOLDOWN_SECONDS - (current_time - self.last_detection_time)
+
+                if remaining > 0:
+                    # During cooldown, drop frames without decoding them -
+                    # cap.grab() advances the driver buffer for a fraction of
+                    # the cost of read() - and decode one frame at ~2 Hz just
+                    # to refresh the on-screen countdown
+                    if not cap.grab():
+                        print("Error: Could not read frame")
                         break
-                    continue
 
-                # Detect cat (and check for person for privacy)
-                cat_detected, confidence, person_detected = self.detect_cat(frame)
+                    # Drain in-flight results so a stale pre-cooldown
+                    # detection isn't handled once the cooldown ends
+                    try:
+                        while True:
+                            result_queue.get_nowait()
+                    except queue.Empty:
+                        pass
+
+                    if current_time - last_countdown_refresh >= 0.5:
+                        ret, frame = cap.retrieve()
+                        if ret:
+                            cv2.putText(frame, f"Cooldown: {int(remaining)}s", (10, 30),
+                                       cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
+                            cv2.imshow('Cat Detector', frame)
+                        last_countdown_refresh = current_time
 
-                # Privacy filter #1: Skip if both person and cat detected
-                if cat_detected and person_detected:
-                    print(f"⚠ Privacy filter: Person detected with cat, skipping frame")
-                    cv2.putText(frame, "PRIVACY: Person detected", (10, 30),
-                               cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-                    cv2.imshow('Cat Detector', frame)
                     if cv2.waitKey(1) & 0xFF == ord('q'):
                         break
                     continue
 
-                if cat_detected:
-                    print(f"Cat detected! (confidence: {confidence:.2f})")
-
-                    # Save image
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    image_path = SAVE_DIR / f"cat_{timestamp}.jpg"
-                    cv2.imwrite(str(image_path), frame)
-                    print(f"Saved image: {image_path}")
+                ret, frame = cap.read()
+                if not ret:
+                    print("Error: Could not read frame")
+                    break
 
-                    # Describe image
-                    description = self.describe_image(image_path)
-                    print(f"Description: {description}")
+                frame_count += 1
 
-                    # Privacy filter #2: Check if description mentions a person
-                    if self.check_person_in_description(description):
-                        print(f"⚠ Privacy filter: Description mentions person, skipping post")
-                        print(f"  (Image saved locally but not posted)")
-                        # Update last detection time to avoid immediate re-detection
+                # Update the motion model on every frame (it needs the full
+                # stream to stay adapted) and gate detection on it: with no
+                # motion there is nothing for YOLO to find
+                small = cv2.resize(frame, MOTION_DOWNSCALE, interpolation=cv2.INTER_AREA)
+                fg = self._bg.apply(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY))
+                motion_detected = cv2.countNonZero(fg) >= MOTION_PIXEL_THRESHOLD
+
+                # Hand every 10th frame to the detector thread; drop it if
+                # the detector hasn't caught up
+                if motion_detected and frame_count % 10 == 0:
+                    try:
+                        frame_queue.put_nowait(frame.copy())
+                    except queue.Full:
+                        pass
+
+                # Pick up a finished detection, if one is ready
+                try:
+                    detected_frame, detection = result_queue.get_nowait()
+                except queue.Empty:
+                    detected_frame, detection = None, None
+
+                if detection is not None:
+                    cat_detected, confidence, person_detected = detection
+
+                    # Privacy filter #1: Skip if both person and cat detected
+                    if cat_detected and person_detected:
+                        print(f"⚠ Privacy filter: Person detected with cat, skipping frame")
+                        cv2.putText(frame, "PRIVACY: Person detected", (10, 30),
+                                   cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+                    elif cat_detected:
+                        print(f"Cat detected! (confidence: {confidence:.2f})")
+                        # Start the cooldown immediately and hand the slow
+                        # describe/post work to the background worker; skip
+                        # if the previous detection is still being processed
                         self.last_detection_time = current_time
-                        continue
-
-                    # Determine state
-                    state = self.determine_state(description)
-                    print(f"State: {state}")
-
-                    # Post to server
-                    self.post_to_server(image_path, description, state)
-
-                    # Update last detection time
-                    self.last_detection_time = current_time
-
-                    # Draw detection on frame
-                    cv2.putText(frame, f"CAT DETECTED! ({confidence:.2f})", (10, 30),
-                               cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+                        if self._detection_future is None or self._detection_future.done():
+                            self._detection_future = self._describe_pool.submit(
+                                self._handle_detection, detected_frame)
+                        else:
+                            print("Previous detection still processing, skipping this one")
+                        cv2.putText(frame, f"CAT DETECTED! ({confidence:.2f})", (10, 30),
+                                   cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
 
                 # Display frame
                 cv2.imshow('Cat Detector', frame)
@@ -358,7 +769,10 @@ class CatDetector:
                     break
 
         finally:
+            stop_event.set()
+            inference_thread.join(timeout=2)
             cap.release()
+            self._cap = None
             cv2.destroyAllWindows()
             print("Webcam released")
 
@@ -372,11 +786,11 @@ def main():
     print("=" * 60)
     print()
 
-    # Select camera
-    camera_index = select_camera()
+    # Select camera (keeps the probed capture open for the detector)
+    camera_index, cap = select_camera()
 
     # Initialize detector with selected camera
-    detector = CatDetector(webcam_index=camera_index)
+    detector = CatDetector(webcam_index=camera_index, cap=cap)
     detector.run()
 
 
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+One-time TensorRT export for the YOLOv8 cat detector.
+Builds an INT8 calibration set from previously captured frames (detected_cats/
+and test_images/), then exports yolov8n.engine. The detector scripts load the
+engine automatically when it exists next to them.
+Falls back to an FP16 engine on GPUs where INT8 calibration fails or is not faster.
+"""
+
+import argparse
+import random
+import shutil
+import sys
+from pathlib import Path
+
+from ultralytics import YOLO
+
+# Configuration
+YOLO_WEIGHTS = 'yolov8n.pt'
+CALIB_SOURCE_DIRS = [
+    Path("./detected_cats"),
+    Path("./test_images"),
+    Path("./calib/captured"),  # one-shot webcam frames from capture_calib_frames.py
+]
+CALIB_DIR = Path("./calib")
+CALIB_YAML = Path("./calib.yaml")
+MIN_CALIB_IMAGES = 16   # TensorRT needs at least a few batches to calibrate
+MAX_CALIB_IMAGES = 500  # ~200-500 representative frames is plenty
+
+
+def collect_calibration_images(extra_dirs=None):
+    """Copy a sample of captured frames into the calibration folder."""
+    source_dirs = CALIB_SOURCE_DIRS + [Path(d) for d in (extra_dirs or [])]
+
+    images = []
+    for source_dir in source_dirs:
+        if source_dir.exists():
+            for ext in ('*.jpg', '*.jpeg', '*.png'):
+                images.extend(source_dir.glob(ext))
+
+    if len(images) > MAX_CALIB_IMAGES:
+        images = random.sample(images, MAX_CALIB_IMAGES)
+
+    if not images:
+        return 0
+
+    image_dir = CALIB_DIR / "images"
+    image_dir.mkdir(parents=True, exist_ok=True)
+    for image_path in images:
+        shutil.copy(image_path, image_dir / image_path.name)
+
+    return len(images)
+
+
+def write_calibration_yaml(model):
+    """Write the dataset yaml that Ultralytics feeds to the TensorRT calibrator."""
+    names = "\n".join(f"  {i}: {name}" for i, name in model.names.items())
+    CALIB_YAML.write_text(
+        f"path: {CALIB_DIR.resolve()}\n"
+        f"train: images\n"
+        f"val: images\n"
+        f"names:\n{names}\n"
+    )
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Export YOLOv8 to a TensorRT engine')
+    parser.add_argument('--imgsz', type=int, default=640, help='Inference image size (default: 640)')
+    parser.add_argument('--half', action='store_true',
+                        help='Export FP16 only, skipping INT8 calibration (for non-Ampere GPUs)')
+    parser.add_argument('--calib-dir', action='append', default=[],
+                        help='Extra directory of calibration images (can be repeated)')
+    parser.add_argument('--onnx', action='store_true',
+                        help='Export ONNX instead of a TensorRT engine (CPU / multi-process use)')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("YOLOv8 TensorRT Export")
+    print("=" * 60)
+
+    print(f"Loading {YOLO_WEIGHTS}...")
+    model = YOLO(YOLO_WEIGHTS)
+
+    if args.onnx:
+        # ONNX Runtime memory-maps the weight file, so worker processes share
+        # one read-only copy instead of each re-deserializing yolov8n.pt
+        print(f"Exporting ONNX model (imgsz={args.imgsz}, dynamic batch)...")
+        onnx_path = model.export(format='onnx', opset=17, simplify=True,
+                                 dynamic=True, imgsz=args.imgsz)
+        print(f"\nDone! Model saved to: {onnx_path}")
+        print("The detector scripts will load it automatically on the next run.")
+        return 0
+
+    if not args.half:
+        num_images = collect_calibration_images(args.calib_dir)
+        if num_images < MIN_CALIB_IMAGES:
+            print(f"Only {num_images} calibration image(s) found "
+                  f"(need at least {MIN_CALIB_IMAGES}) - falling back to FP16.")
+            args.half = True
+        else:
+            print(f"Collected {num_images} calibration images in {CALIB_DIR}/")
+            write_calibration_yaml(model)
+
+    if args.half:
+        print(f"Exporting FP16 engine (imgsz={args.imgsz})...")
+        engine_path = model.export(format='engine', half=True, imgsz=args.imgsz, workspace=4)
+    else:
+        print(f"Exporting INT8 engine (imgsz={args.imgsz})...")
+        try:
+            engine_path = model.export(format='engine', int8=True, half=False,
+                                       imgsz=args.imgsz, data=str(CALIB_YAML), workspace=4)
+        except Exception as e:
+            print(f"INT8 export failed ({e}), falling back to FP16...")
+            engine_path = model.export(format='engine', half=True, imgsz=args.imgsz, workspace=4)
+
+    print(f"\nDone! Engine saved to: {engine_path}")
+    print("The detector scripts will load it automatically on the next run.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())